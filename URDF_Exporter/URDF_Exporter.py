@@ -4,77 +4,11 @@
 
 import adsk, adsk.core, adsk.fusion, traceback
 import os
-import sys
-
-# Add the path to import NameManager
-script_dir = os.path.dirname(os.path.abspath(__file__))
-if script_dir not in sys.path:
-    sys.path.insert(0, script_dir)
 
 from .utils import utils
+from .utils.name_manager import NameManager
 from .core import Link, Joint, Write
 
-# Import or define NameManager
-try:
-    from .utils.name_manager import NameManager
-except:
-    # If import fails, define it inline
-    import re
-    
-    class NameManager:
-        def __init__(self):
-            self.link_name_map = {}
-            self.link_name_counts = {}
-            self.used_names = set()
-            
-        def clean_name(self, name):
-            cleaned = name.replace(',', '')
-            cleaned = re.sub('[ :()]', '_', cleaned)
-            cleaned = re.sub('_+', '_', cleaned)
-            cleaned = cleaned.strip('_')
-            return cleaned
-        
-        def get_unique_link_name(self, occurrence_name, component_name):
-            if occurrence_name in self.link_name_map:
-                return self.link_name_map[occurrence_name]
-            
-            base_name = self.clean_name(component_name)
-            
-            if base_name.lower() == 'base_link':
-                unique_name = 'base_link'
-                if unique_name not in self.used_names:
-                    self.link_name_map[occurrence_name] = unique_name
-                    self.used_names.add(unique_name)
-                    return unique_name
-            
-            if base_name in self.link_name_counts:
-                self.link_name_counts[base_name] += 1
-                unique_name = f"{base_name}_{self.link_name_counts[base_name]}"
-            else:
-                if base_name in self.used_names:
-                    self.link_name_counts[base_name] = 1
-                    unique_name = f"{base_name}_1"
-                else:
-                    self.link_name_counts[base_name] = 0
-                    unique_name = base_name
-            
-            self.link_name_map[occurrence_name] = unique_name
-            self.used_names.add(unique_name)
-            return unique_name
-        
-        def get_link_name_for_occurrence(self, occurrence_name):
-            return self.link_name_map.get(occurrence_name)
-        
-        def get_unique_joint_name(self, joint_name):
-            return self.clean_name(joint_name)
-        
-        def print_mapping(self):
-            print("\n=== Link Name Mapping ===")
-            for original, unique in sorted(self.link_name_map.items()):
-                if original != unique:
-                    print(f"{original} -> {unique}")
-            print("========================\n")
-
 """
 # length unit is 'cm' and inertial unit is 'kg/cm^2'
 # If there is no 'body' in the root component, maybe the coordinates are wrong.
@@ -84,6 +18,9 @@ except:
 # joint velocity: 100
 # supports "Revolute", "Rigid" and "Slider" joint types
 
+# set to True to print the link/mesh name mapping to the console
+DEBUG = False
+
 def run(context):
     ui = None
     success_msg = 'Successfully create URDF file'
@@ -103,7 +40,6 @@ def run(context):
             return
         
         root = design.rootComponent  # root component 
-        components = design.allComponents
         
         # Initialize NameManager for handling duplicate names
         name_manager = NameManager()
@@ -118,10 +54,7 @@ def run(context):
             return 0
         
         save_dir = save_dir + '/' + package_name
-        try: 
-            os.mkdir(save_dir)
-        except: 
-            pass     
+        os.makedirs(save_dir, exist_ok=True)
         
         package_dir = os.path.abspath(os.path.dirname(__file__)) + '/package/'
         
@@ -139,11 +72,11 @@ def run(context):
         
         if not has_base_link:
             # Try to find any component that starts with "base_link"
-            base_link_candidates = [key for key in inertial_dict.keys() 
-                                   if key.lower().startswith('base_link')]
+            base_link_candidate = next((key for key in inertial_dict
+                                        if key.lower().startswith('base_link')), None)
             
-            if base_link_candidates:
-                msg = f'Found component "{base_link_candidates[0]}" but it should be named exactly "base_link" (without version numbers).\n\n'
+            if base_link_candidate:
+                msg = f'Found component "{base_link_candidate}" but it should be named exactly "base_link" (without version numbers).\n\n'
                 msg += 'The exporter has automatically handled this, but please rename your component to "base_link" in Fusion 360 for clarity.'
                 ui.messageBox(msg, title)
             else:
@@ -160,9 +93,17 @@ def run(context):
             return 0   
         
         # Print name mapping for debugging
-        name_manager.print_mapping()
+        if DEBUG:
+            name_manager.print_mapping()
+        
+        # pre-sized with every link name, the writers fill in the values
+        links_xyz_dict = dict.fromkeys(inertial_dict)
         
-        links_xyz_dict = {}
+        # links of identical parts reference a single mesh
+        mesh_aliases = utils.find_mesh_aliases(root, name_manager)
+        for occs_dict in inertial_dict.values():
+            mesh_filename = occs_dict['mesh_filename']
+            occs_dict['mesh_filename'] = mesh_aliases.get(mesh_filename, mesh_filename)
         
         # --------------------
         # Generate URDF
@@ -182,7 +123,7 @@ def run(context):
         
         # Generate STL files with unique names
         utils.copy_occs(root, name_manager)
-        utils.export_stl(design, save_dir, components, name_manager)   
+        utils.export_stl(design, save_dir, name_manager, mesh_aliases)
         
         ui.messageBox(msg, title)
         
@@ -7,9 +7,31 @@ Modified to handle Fusion 360 versioned component names
 """
 
 import adsk, re
+from dataclasses import dataclass
 from xml.etree.ElementTree import Element, SubElement
 from ..utils import utils
 
+# these are the names in urdf, indexed by Fusion's jointType
+_JOINT_TYPE_LIST = (
+    'fixed', 'revolute', 'prismatic', 'Cylinderical',
+    'PinSlot', 'Planner', 'Ball')
+
+_NAME_SUB = re.compile(r'[ :()]')
+
+@dataclass(slots=True)
+class JointSpec:
+    """
+    Joint information collected from Fusion 360 by make_joints_dict
+    """
+    type: str
+    axis: tuple
+    upper_limit: float
+    lower_limit: float
+    parent: str
+    child: str
+    xyz: list
+
+
 class Joint:
     def __init__(self, name, xyz, axis, parent, child, joint_type, upper_limit, lower_limit):
         """
@@ -27,9 +49,9 @@ class Joint:
             parent link
         child: str
             child link
-        joint_xml: str
+        joint_xml: xml.etree.ElementTree.Element
             generated xml describing about the joint
-        tran_xml: str
+        tran_xml: xml.etree.ElementTree.Element
             generated xml describing about the transmission
         """
         self.name = name
@@ -46,13 +68,18 @@ class Joint:
     def make_joint_xml(self):
         """
         Generate the joint_xml and hold it by self.joint_xml
+        
+        Returns
+        ----------
+        joint_xml: xml.etree.ElementTree.Element
         """
         joint = Element('joint')
         # Joint name is lowercase
         joint.attrib = {'name': self.name, 'type': self.type}
         
         origin = SubElement(joint, 'origin')
-        origin.attrib = {'xyz':' '.join([str(_) for _ in self.xyz]), 'rpy':'0 0 0'}
+        xyz = self.xyz
+        origin.attrib = {'xyz': f"{xyz[0]} {xyz[1]} {xyz[2]}", 'rpy':'0 0 0'}
         parent = SubElement(joint, 'parent')
         # Parent and child are already lowercase unique names
         parent.attrib = {'link': self.parent}
@@ -60,18 +87,23 @@ class Joint:
         child.attrib = {'link': self.child}
         if self.type == 'revolute' or self.type == 'continuous' or self.type == 'prismatic':        
             axis = SubElement(joint, 'axis')
-            axis.attrib = {'xyz':' '.join([str(_) for _ in self.axis])}
+            axis_xyz = self.axis
+            axis.attrib = {'xyz': f"{axis_xyz[0]} {axis_xyz[1]} {axis_xyz[2]}"}
         if self.type == 'revolute' or self.type == 'prismatic':
             limit = SubElement(joint, 'limit')
             limit.attrib = {'upper': str(self.upper_limit), 'lower': str(self.lower_limit),
                             'effort': '100', 'velocity': '100'}
-            
-        self.joint_xml = "\n".join(utils.prettify(joint).split("\n")[1:])
+        
+        self.joint_xml = joint
+        return joint
 
     def make_transmission_xml(self):
         """
         Generate the tran_xml and hold it by self.tran_xml
         
+        Returns
+        ----------
+        tran_xml: xml.etree.ElementTree.Element
         
         Notes
         -----------
@@ -99,27 +131,23 @@ class Joint:
         mechanicalReduction = SubElement(actuator, 'mechanicalReduction')
         mechanicalReduction.text = '1'
         
-        self.tran_xml = "\n".join(utils.prettify(tran).split("\n")[1:])
+        self.tran_xml = tran
+        return tran
 
 
-def is_base_link(component_name):
-    """
-    Check if a component name represents the base_link
-    Handles Fusion 360's version numbering (e.g., "base_link v1", "base_link v2")
-    
-    Parameters
-    ----------
-    component_name: str
-        The component name to check
-        
-    Returns
-    -------
-    bool
-        True if this is a base_link component
-    """
-    # Remove version numbers and whitespace, convert to lowercase for comparison
-    clean_name = component_name.split()[0].lower()
-    return clean_name == 'base_link'
+# Coordinate transformation by matrix
+# M: 4x4 transformation matrix
+# a: 3D vector
+def trans(M, a):
+    x, y, z = a[0], a[1], a[2]
+    return [x*M[0] + y*M[1] + z*M[2] + M[3],
+            x*M[4] + y*M[5] + z*M[6] + M[7],
+            x*M[8] + y*M[9] + z*M[10] + M[11]]
+
+
+# Returns True if two arrays are element-wise equal within a tolerance
+def allclose(v1, v2, tol=1e-6):
+    return all(abs(a-b) < tol for a, b in zip(v1, v2))
 
 
 def make_joints_dict(root, msg, name_manager=None):
@@ -139,36 +167,40 @@ def make_joints_dict(root, msg, name_manager=None):
     Returns
     ----------
     joints_dict: 
-        {name: {type, axis, upper_limit, lower_limit, parent, child, xyz}}
+        {name: JointSpec(type, axis, upper_limit, lower_limit, parent, child, xyz)}
     msg: str
         Tell the status
     """
 
-    joint_type_list = [
-    'fixed', 'revolute', 'prismatic', 'Cylinderical',
-    'PinSlot', 'Planner', 'Ball']  # these are the names in urdf
-
     joints_dict = {}
     
     for joint in root.joints:
-        joint_dict = {}
-        joint_type = joint_type_list[joint.jointMotion.jointType]
-        joint_dict['type'] = joint_type
+        # every property access is a round trip into Fusion, so read them once
+        motion = joint.jointMotion
+        occ_one = joint.occurrenceOne
+        occ_two = joint.occurrenceTwo
+        occ_one_name = occ_one.name
+        occ_two_name = occ_two.name
+        comp_one_name = occ_one.component.name
+        comp_two_name = occ_two.component.name
+        
+        joint_type = _JOINT_TYPE_LIST[motion.jointType]
         
         # switch by the type of the joint
-        joint_dict['axis'] = [0, 0, 0]
-        joint_dict['upper_limit'] = 0.0
-        joint_dict['lower_limit'] = 0.0
+        axis = (0, 0, 0)
+        upper_limit = 0.0
+        lower_limit = 0.0
         
         # support  "Revolute", "Rigid" and "Slider"
         if joint_type == 'revolute':
-            joint_dict['axis'] = [round(i, 6) for i in \
-                joint.jointMotion.rotationAxisVector.asArray()] ## In Fusion, exported axis is normalized.
-            max_enabled = joint.jointMotion.rotationLimits.isMaximumValueEnabled
-            min_enabled = joint.jointMotion.rotationLimits.isMinimumValueEnabled            
+            a = motion.rotationAxisVector.asArray() ## In Fusion, exported axis is normalized.
+            axis = (round(a[0], 6), round(a[1], 6), round(a[2], 6))
+            limits = motion.rotationLimits
+            max_enabled = limits.isMaximumValueEnabled
+            min_enabled = limits.isMinimumValueEnabled            
             if max_enabled and min_enabled:  
-                joint_dict['upper_limit'] = round(joint.jointMotion.rotationLimits.maximumValue, 6)
-                joint_dict['lower_limit'] = round(joint.jointMotion.rotationLimits.minimumValue, 6)
+                upper_limit = round(limits.maximumValue, 6)
+                lower_limit = round(limits.minimumValue, 6)
             elif max_enabled and not min_enabled:
                 msg = joint.name + ' is not set its lower limit. Please set it and try again.'
                 break
@@ -176,16 +208,17 @@ def make_joints_dict(root, msg, name_manager=None):
                 msg = joint.name + ' is not set its upper limit. Please set it and try again.'
                 break
             else:  # if there is no angle limit
-                joint_dict['type'] = 'continuous'
+                joint_type = 'continuous'
                 
         elif joint_type == 'prismatic':
-            joint_dict['axis'] = [round(i, 6) for i in \
-                joint.jointMotion.slideDirectionVector.asArray()]  # Also normalized
-            max_enabled = joint.jointMotion.slideLimits.isMaximumValueEnabled
-            min_enabled = joint.jointMotion.slideLimits.isMinimumValueEnabled            
+            a = motion.slideDirectionVector.asArray()  # Also normalized
+            axis = (round(a[0], 6), round(a[1], 6), round(a[2], 6))
+            limits = motion.slideLimits
+            max_enabled = limits.isMaximumValueEnabled
+            min_enabled = limits.isMinimumValueEnabled            
             if max_enabled and min_enabled:  
-                joint_dict['upper_limit'] = round(joint.jointMotion.slideLimits.maximumValue/100, 6)
-                joint_dict['lower_limit'] = round(joint.jointMotion.slideLimits.minimumValue/100, 6)
+                upper_limit = round(limits.maximumValue/100, 6)
+                lower_limit = round(limits.minimumValue/100, 6)
             elif max_enabled and not min_enabled:
                 msg = joint.name + ' is not set its lower limit. Please set it and try again.'
                 break
@@ -198,55 +231,32 @@ def make_joints_dict(root, msg, name_manager=None):
         # Get unique names for parent and child using name manager
         if name_manager:
             # Check if occurrenceTwo is base_link (with version handling)
-            if is_base_link(joint.occurrenceTwo.component.name):
-                joint_dict['parent'] = 'base_link'
+            if utils.is_base_link(comp_two_name):
+                parent = 'base_link'
             else:
-                parent_name = name_manager.get_link_name_for_occurrence(joint.occurrenceTwo.name)
-                if parent_name is None:
-                    parent_name = name_manager.get_unique_link_name(joint.occurrenceTwo.name, joint.occurrenceTwo.component.name)
-                joint_dict['parent'] = parent_name
+                # get_unique_link_name returns the stored name for known occurrences
+                parent = name_manager.get_unique_link_name(occ_two_name, comp_two_name)
             
-            child_name = name_manager.get_link_name_for_occurrence(joint.occurrenceOne.name)
-            if child_name is None:
-                child_name = name_manager.get_unique_link_name(joint.occurrenceOne.name, joint.occurrenceOne.component.name)
-            joint_dict['child'] = child_name
+            child = name_manager.get_unique_link_name(occ_one_name, comp_one_name)
         else:
             # Fallback to old behavior
-            if is_base_link(joint.occurrenceTwo.component.name):
-                joint_dict['parent'] = 'base_link'
+            if utils.is_base_link(comp_two_name):
+                parent = 'base_link'
             else:
-                joint_dict['parent'] = re.sub('[ :()]', '_', joint.occurrenceTwo.name)
-            joint_dict['child'] = re.sub('[ :()]', '_', joint.occurrenceOne.name)
+                parent = _NAME_SUB.sub('_', occ_two_name)
+            child = _NAME_SUB.sub('_', occ_one_name)
         
         
         #There seem to be a problem with geometryOrOriginTwo. To calculate the correct origin of the generated stl files following approach was used.
         #https://forums.autodesk.com/t5/fusion-360-api-and-scripts/difference-of-geometryororiginone-and-geometryororiginonetwo/m-p/9837767
         #Thanks to Masaki Yamamoto!
         
-        # Coordinate transformation by matrix
-        # M: 4x4 transformation matrix
-        # a: 3D vector
-        def trans(M, a):
-            ex = [M[0],M[4],M[8]]
-            ey = [M[1],M[5],M[9]]
-            ez = [M[2],M[6],M[10]]
-            oo = [M[3],M[7],M[11]]
-            b = [0, 0, 0]
-            for i in range(3):
-                b[i] = a[0]*ex[i]+a[1]*ey[i]+a[2]*ez[i]+oo[i]
-            return(b)
-
-
-        # Returns True if two arrays are element-wise equal within a tolerance
-        def allclose(v1, v2, tol=1e-6):
-            return( max([abs(a-b) for a,b in zip(v1, v2)]) < tol )
-
         try:
+            geometry_two = joint.geometryOrOriginTwo
             xyz_from_one_to_joint = joint.geometryOrOriginOne.origin.asArray() # Relative Joint pos
-            xyz_from_two_to_joint = joint.geometryOrOriginTwo.origin.asArray() # Relative Joint pos
-            xyz_of_one            = joint.occurrenceOne.transform.translation.asArray() # Link origin
-            xyz_of_two            = joint.occurrenceTwo.transform.translation.asArray() # Link origin
-            M_two = joint.occurrenceTwo.transform.asArray() # Matrix as a 16 element array.
+            xyz_from_two_to_joint = geometry_two.origin.asArray() # Relative Joint pos
+            xyz_of_one            = occ_one.transform.translation.asArray() # Link origin
+            M_two = occ_two.transform.asArray() # Matrix as a 16 element array.
 
         # Compose joint position
             case1 = allclose(xyz_from_two_to_joint, xyz_from_one_to_joint)
@@ -257,15 +267,16 @@ def make_joints_dict(root, msg, name_manager=None):
                 xyz_of_joint = trans(M_two, xyz_from_two_to_joint)
 
 
-            joint_dict['xyz'] = [round(i / 100.0, 6) for i in xyz_of_joint]  # converted to meter
+            xyz = [round(i / 100.0, 6) for i in xyz_of_joint]  # converted to meter
 
         except:
             try:
-                if type(joint.geometryOrOriginTwo)==adsk.fusion.JointOrigin:
-                    data = joint.geometryOrOriginTwo.geometry.origin.asArray()
+                geometry_two = joint.geometryOrOriginTwo
+                if type(geometry_two)==adsk.fusion.JointOrigin:
+                    data = geometry_two.geometry.origin.asArray()
                 else:
-                    data = joint.geometryOrOriginTwo.origin.asArray()
-                joint_dict['xyz'] = [round(i / 100.0, 6) for i in data]  # converted to meter
+                    data = geometry_two.origin.asArray()
+                xyz = [round(i / 100.0, 6) for i in data]  # converted to meter
             except:
                 msg = joint.name + " doesn't have joint origin. Please set it and run again."
                 break
@@ -274,7 +285,9 @@ def make_joints_dict(root, msg, name_manager=None):
         if name_manager:
             clean_joint_name = name_manager.get_unique_joint_name(joint.name)
         else:
-            clean_joint_name = re.sub('[ :()]', '_', joint.name)
+            clean_joint_name = _NAME_SUB.sub('_', joint.name)
             
-        joints_dict[clean_joint_name] = joint_dict
+        joints_dict[clean_joint_name] = JointSpec(type=joint_type, axis=axis,
+            upper_limit=upper_limit, lower_limit=lower_limit,
+            parent=parent, child=child, xyz=xyz)
     return joints_dict, msg
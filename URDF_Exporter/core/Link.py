@@ -22,7 +22,7 @@ class Link:
             coordinate for the visual and collision
         center_of_mass: [x, y, z]
             coordinate for the center of mass
-        link_xml: str
+        link_xml: xml.etree.ElementTree.Element
             generated xml describing about the link
         repo: str
             the name of the repository to save the xml file
@@ -47,6 +47,10 @@ class Link:
     def make_link_xml(self):
         """
         Generate the link_xml and hold it by self.link_xml
+        
+        Returns
+        ----------
+        link_xml: xml.etree.ElementTree.Element
         """
         
         link = Element('link')
@@ -85,28 +89,8 @@ class Link:
         # Use mesh_filename (without suffix, lowercase)
         mesh_c.attrib = {'filename':'package://' + self.repo + self.mesh_filename + '.stl','scale':'0.001 0.001 0.001'}
 
-        # print("\n".join(utils.prettify(link).split("\n")[1:]))
-        self.link_xml = "\n".join(utils.prettify(link).split("\n")[1:])
-
-
-def is_base_link(component_name):
-    """
-    Check if a component name represents the base_link
-    Handles Fusion 360's version numbering (e.g., "base_link v1", "base_link v2")
-    
-    Parameters
-    ----------
-    component_name: str
-        The component name to check
-        
-    Returns
-    -------
-    bool
-        True if this is a base_link component
-    """
-    # Remove version numbers and whitespace, convert to lowercase for comparison
-    clean_name = component_name.split()[0].lower()
-    return clean_name == 'base_link'
+        self.link_xml = link
+        return link
 
 
 def make_inertial_dict(root, msg, name_manager=None):
@@ -142,7 +126,8 @@ def make_inertial_dict(root, msg, name_manager=None):
             mesh_filename = name_manager.get_mesh_filename(occs.component.name)
         else:
             unique_name = re.sub('[ :(),]', '_', occs.name).lower()
-            mesh_filename = unique_name
+            # all occurrences of a component share the mesh exported by export_stl
+            mesh_filename = utils.get_mesh_filename(occs.component.name)
         
         occs_dict['name'] = unique_name
         occs_dict['mesh_filename'] = mesh_filename
@@ -158,7 +143,7 @@ def make_inertial_dict(root, msg, name_manager=None):
         occs_dict['inertia'] = utils.origin2center_of_mass(moment_inertia_world, center_of_mass, mass)
         
         # Check if this is base_link (with version handling)
-        if is_base_link(occs.component.name):
+        if utils.is_base_link(occs.component.name):
             inertial_dict['base_link'] = occs_dict
         else:
             inertial_dict[unique_name] = occs_dict
@@ -11,9 +11,51 @@ from xml.etree.ElementTree import Element, SubElement
 from . import Link, Joint
 from ..utils import utils
 
-def write_link_urdf(joints_dict, repo, links_xyz_dict, file_name, inertial_dict):
+def make_joints(joints_dict, links_xyz_dict):
     """
-    Write links information into urdf "repo/file_name"
+    Build the Joint objects shared by the urdf and transmission writers
+    
+    
+    Parameters
+    ----------
+    joints_dict: dict
+        information of the each joint
+    links_xyz_dict: dict
+        xyz information of the each link
+    
+    Returns
+    ----------
+    joints: [Joint.Joint]
+    """
+    joints = []
+    for j in joints_dict:
+        parent = joints_dict[j].parent
+        child = joints_dict[j].child
+        joint_type = joints_dict[j].type
+        upper_limit = joints_dict[j].upper_limit
+        lower_limit = joints_dict[j].lower_limit
+        # links_xyz_dict may be pre-filled with None for links not set yet
+        parent_xyz = links_xyz_dict.get(parent)
+        child_xyz = links_xyz_dict.get(child)
+        if parent_xyz is None or child_xyz is None:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            ui.messageBox("There seems to be an error with the connection between\n\n%s\nand\n%s\n\nCheck \
+whether the connections\nparent=component2=%s\nchild=component1=%s\nare correct or if you need \
+to swap component1<=>component2"
+            % (parent, child, parent, child), "Error!")
+            quit()
+        xyz = [round(p-c, 6) for p, c in zip(parent_xyz, child_xyz)]  # xyz = parent - child
+            
+        joints.append(Joint.Joint(name=j, joint_type = joint_type, xyz=xyz, \
+        axis=joints_dict[j].axis, parent=parent, child=child, \
+        upper_limit=upper_limit, lower_limit=lower_limit))
+    return joints
+
+
+def write_link_urdf(joints_dict, repo, links_xyz_dict, robot, inertial_dict):
+    """
+    Append links information to the urdf tree "robot"
     
     
     Parameters
@@ -22,52 +64,47 @@ def write_link_urdf(joints_dict, repo, links_xyz_dict, file_name, inertial_dict)
         information of the each joint
     repo: str
         the name of the repository to save the xml file
-    links_xyz_dict: vacant dict
-        xyz information of the each link
-    file_name: str
-        urdf full path
+    links_xyz_dict: dict
+        xyz information of the each link, filled here (may be pre-filled with None)
+    robot: xml.etree.ElementTree.Element
+        <robot> element of the urdf
     inertial_dict:
         information of the each inertial
     
     Note
     ----------
-    In this function, links_xyz_dict is set for write_joint_tran_urdf.
+    In this function, links_xyz_dict is set for write_joint_urdf.
     The origin of the coordinate of center_of_mass is the coordinate of the link
     """
-    with open(file_name, mode='a') as f:
-        # for base_link
-        center_of_mass = inertial_dict['base_link']['center_of_mass']
-        mesh_filename = inertial_dict['base_link'].get('mesh_filename', 'base_link')
-        link = Link.Link(name='base_link', xyz=[0,0,0], 
-            center_of_mass=center_of_mass, repo=repo,
-            mass=inertial_dict['base_link']['mass'],
-            inertia_tensor=inertial_dict['base_link']['inertia'],
+    # for base_link
+    center_of_mass = inertial_dict['base_link']['center_of_mass']
+    mesh_filename = inertial_dict['base_link'].get('mesh_filename', 'base_link')
+    link = Link.Link(name='base_link', xyz=[0,0,0], 
+        center_of_mass=center_of_mass, repo=repo,
+        mass=inertial_dict['base_link']['mass'],
+        inertia_tensor=inertial_dict['base_link']['inertia'],
+        mesh_filename=mesh_filename)
+    links_xyz_dict[link.name] = link.xyz
+    robot.append(link.make_link_xml())
+
+    # others
+    for joint in joints_dict:
+        name = joints_dict[joint].child
+        center_of_mass = \
+            [ i-j for i, j in zip(inertial_dict[name]['center_of_mass'], joints_dict[joint].xyz)]
+        mesh_filename = inertial_dict[name].get('mesh_filename', name)
+        link = Link.Link(name=name, xyz=joints_dict[joint].xyz,\
+            center_of_mass=center_of_mass,\
+            repo=repo, mass=inertial_dict[name]['mass'],\
+            inertia_tensor=inertial_dict[name]['inertia'],
             mesh_filename=mesh_filename)
-        links_xyz_dict[link.name] = link.xyz
-        link.make_link_xml()
-        f.write(link.link_xml)
-        f.write('\n')
-
-        # others
-        for joint in joints_dict:
-            name = joints_dict[joint]['child']
-            center_of_mass = \
-                [ i-j for i, j in zip(inertial_dict[name]['center_of_mass'], joints_dict[joint]['xyz'])]
-            mesh_filename = inertial_dict[name].get('mesh_filename', name)
-            link = Link.Link(name=name, xyz=joints_dict[joint]['xyz'],\
-                center_of_mass=center_of_mass,\
-                repo=repo, mass=inertial_dict[name]['mass'],\
-                inertia_tensor=inertial_dict[name]['inertia'],
-                mesh_filename=mesh_filename)
-            links_xyz_dict[link.name] = link.xyz            
-            link.make_link_xml()
-            f.write(link.link_xml)
-            f.write('\n')
+        links_xyz_dict[link.name] = link.xyz            
+        robot.append(link.make_link_xml())
 
 
-def write_joint_urdf(joints_dict, repo, links_xyz_dict, file_name):
+def write_joint_urdf(joints_dict, repo, links_xyz_dict, robot):
     """
-    Write joints and transmission information into urdf "repo/file_name"
+    Append joints information to the urdf tree "robot"
     
     
     Parameters
@@ -78,50 +115,12 @@ def write_joint_urdf(joints_dict, repo, links_xyz_dict, file_name):
         the name of the repository to save the xml file
     links_xyz_dict: dict
         xyz information of the each link
-    file_name: str
-        urdf full path
+    robot: xml.etree.ElementTree.Element
+        <robot> element of the urdf
     """
-    
-    with open(file_name, mode='a') as f:
-        for j in joints_dict:
-            parent = joints_dict[j]['parent']
-            child = joints_dict[j]['child']
-            joint_type = joints_dict[j]['type']
-            upper_limit = joints_dict[j]['upper_limit']
-            lower_limit = joints_dict[j]['lower_limit']
-            try:
-                xyz = [round(p-c, 6) for p, c in \
-                    zip(links_xyz_dict[parent], links_xyz_dict[child])]  # xyz = parent - child
-            except KeyError as ke:
-                app = adsk.core.Application.get()
-                ui = app.userInterface
-                ui.messageBox("There seems to be an error with the connection between\n\n%s\nand\n%s\n\nCheck \
-whether the connections\nparent=component2=%s\nchild=component1=%s\nare correct or if you need \
-to swap component1<=>component2"
-                % (parent, child, parent, child), "Error!")
-                quit()
-                
-            joint = Joint.Joint(name=j, joint_type = joint_type, xyz=xyz, \
-            axis=joints_dict[j]['axis'], parent=parent, child=child, \
-            upper_limit=upper_limit, lower_limit=lower_limit)
-            joint.make_joint_xml()
-            joint.make_transmission_xml()
-            f.write(joint.joint_xml)
-            f.write('\n')
+    for joint in make_joints(joints_dict, links_xyz_dict):
+        robot.append(joint.make_joint_xml())
 
-def write_gazebo_endtag(file_name):
-    """
-    Write about gazebo_plugin and the </robot> tag at the end of the urdf
-    
-    
-    Parameters
-    ----------
-    file_name: str
-        urdf full path
-    """
-    with open(file_name, mode='a') as f:
-        f.write('</robot>\n')
-        
 
 def write_urdf(joints_dict, links_xyz_dict, inertial_dict, package_name, robot_name, save_dir):
     # Create urdf directory if it doesn't exist
@@ -131,20 +130,16 @@ def write_urdf(joints_dict, links_xyz_dict, inertial_dict, package_name, robot_n
     file_name = os.path.join(urdf_dir, robot_name + '.xacro')
     repo = package_name + '/meshes/'
     
-    with open(file_name, mode='w') as f:
-        f.write('<?xml version="1.0" ?>\n')
-        f.write('<robot name="{}" xmlns:xacro="http://www.ros.org/wiki/xacro">\n'.format(robot_name))
-        f.write('\n')
-        f.write('<xacro:include filename="$(find {})/urdf/materials.xacro" />'.format(package_name))
-        f.write('\n')
-        f.write('<xacro:include filename="$(find {})/urdf/{}.trans" />'.format(package_name, robot_name))
-        f.write('\n')
-        f.write('<xacro:include filename="$(find {})/urdf/{}.gazebo" />'.format(package_name, robot_name))
-        f.write('\n')
+    robot = Element('robot')
+    robot.attrib = {'name': robot_name, 'xmlns:xacro': 'http://www.ros.org/wiki/xacro'}
+    for include_file in ('materials.xacro', robot_name + '.trans', robot_name + '.gazebo'):
+        include_ = SubElement(robot, 'xacro:include')
+        include_.attrib = {'filename': '$(find {})/urdf/{}'.format(package_name, include_file)}
 
-    write_link_urdf(joints_dict, repo, links_xyz_dict, file_name, inertial_dict)
-    write_joint_urdf(joints_dict, repo, links_xyz_dict, file_name)
-    write_gazebo_endtag(file_name)
+    write_link_urdf(joints_dict, repo, links_xyz_dict, robot, inertial_dict)
+    write_joint_urdf(joints_dict, repo, links_xyz_dict, robot)
+    with open(file_name, mode='wb') as f:
+        utils.prettify_to(robot, f)
 
 def write_materials_xacro(joints_dict, links_xyz_dict, inertial_dict, package_name, robot_name, save_dir):
     # Create urdf directory if it doesn't exist
@@ -185,38 +180,14 @@ def write_transmissions_xacro(joints_dict, links_xyz_dict, inertial_dict, packag
     
     file_name = os.path.join(urdf_dir, robot_name + '.trans')
     
-    with open(file_name, mode='w') as f:
-        f.write('<?xml version="1.0" ?>\n')
-        f.write('<robot name="{}" xmlns:xacro="http://www.ros.org/wiki/xacro" >\n'.format(robot_name))
-        f.write('\n')
-
-        for j in joints_dict:
-            parent = joints_dict[j]['parent']
-            child = joints_dict[j]['child']
-            joint_type = joints_dict[j]['type']
-            upper_limit = joints_dict[j]['upper_limit']
-            lower_limit = joints_dict[j]['lower_limit']
-            try:
-                xyz = [round(p-c, 6) for p, c in \
-                    zip(links_xyz_dict[parent], links_xyz_dict[child])]  # xyz = parent - child
-            except KeyError as ke:
-                app = adsk.core.Application.get()
-                ui = app.userInterface
-                ui.messageBox("There seems to be an error with the connection between\n\n%s\nand\n%s\n\nCheck \
-whether the connections\nparent=component2=%s\nchild=component1=%s\nare correct or if you need \
-to swap component1<=>component2"
-                % (parent, child, parent, child), "Error!")
-                quit()
-                
-            joint = Joint.Joint(name=j, joint_type = joint_type, xyz=xyz, \
-            axis=joints_dict[j]['axis'], parent=parent, child=child, \
-            upper_limit=upper_limit, lower_limit=lower_limit)
-            if joint_type != 'fixed':
-                joint.make_transmission_xml()
-                f.write(joint.tran_xml)
-                f.write('\n')
+    robot = Element('robot')
+    robot.attrib = {'name': robot_name, 'xmlns:xacro': 'http://www.ros.org/wiki/xacro'}
+    for joint in make_joints(joints_dict, links_xyz_dict):
+        if joint.type != 'fixed':
+            robot.append(joint.make_transmission_xml())
 
-        f.write('</robot>\n')
+    with open(file_name, mode='wb') as f:
+        utils.prettify_to(robot, f)
 
 def write_gazebo_xacro(joints_dict, links_xyz_dict, inertial_dict, package_name, robot_name, save_dir):
     # Create urdf directory if it doesn't exist
@@ -251,7 +222,7 @@ def write_gazebo_xacro(joints_dict, links_xyz_dict, inertial_dict, package_name,
 
         # others
         for joint in joints_dict:
-            name = joints_dict[joint]['child']
+            name = joints_dict[joint].child
             f.write('<gazebo reference="{}">\n'.format(name))
             f.write('  <material>${body_color}</material>\n')
             f.write('  <mu1>0.2</mu1>\n')
@@ -304,11 +275,9 @@ def write_display_launch(package_name, robot_name, save_dir):
     node3 = SubElement(launch, 'node')
     node3.attrib = {'name':'rviz', 'pkg':'rviz', 'args':'-d $(arg rvizconfig)', 'type':'rviz', 'required':'true'}
 
-    launch_xml = "\n".join(utils.prettify(launch).split("\n")[1:])        
-
     file_name = os.path.join(launch_dir, 'display.launch')
-    with open(file_name, mode='w') as f:
-        f.write(launch_xml)
+    with open(file_name, mode='wb') as f:
+        utils.prettify_to(launch, f)
 
 def write_gazebo_launch(package_name, robot_name, save_dir):
     """
@@ -348,11 +317,9 @@ def write_gazebo_launch(package_name, robot_name, save_dir):
         arg.attrib = {'name' : args_name_value_pairs[i][0] , 
         'value' : args_name_value_pairs[i][1]}
 
-    launch_xml = "\n".join(utils.prettify(launch).split("\n")[1:])        
-    
     file_name = os.path.join(launch_dir, 'gazebo.launch')
-    with open(file_name, mode='w') as f:
-        f.write(launch_xml)
+    with open(file_name, mode='wb') as f:
+        utils.prettify_to(launch, f)
 
 
 def write_control_launch(package_name, robot_name, save_dir, joints_dict):
@@ -377,7 +344,7 @@ def write_control_launch(package_name, robot_name, save_dir, joints_dict):
                        
     controller_args_str = ""
     for j in joints_dict:
-        joint_type = joints_dict[j]['type']
+        joint_type = joints_dict[j].type
         if joint_type != 'fixed':
             # Joint names are already lowercase
             controller_args_str += j + '_position_controller '
@@ -440,7 +407,7 @@ def write_yaml(package_name, robot_name, save_dir, joints_dict):
         # position_controllers
         f.write('  # Position Controllers --------------------------------------\n')
         for joint in joints_dict:
-            joint_type = joints_dict[joint]['type']
+            joint_type = joints_dict[joint].type
             if joint_type != 'fixed':
                 # Joint names are already lowercase
                 f.write('  ' + joint + '_position_controller:\n')
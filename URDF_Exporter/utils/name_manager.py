@@ -4,6 +4,17 @@ Name manager to handle duplicate names and ensure uniqueness
 """
 
 import re
+from collections import Counter
+from .utils import is_base_link
+
+# A run of separators/underscores (commas allowed inside) collapses to one
+# underscore; a run made only of commas is removed.
+_CLEAN_RE = re.compile(r'(,*[ :()_][ :()_,]*)|,+')
+
+
+def _clean_repl(match):
+    return '_' if match.group(1) else ''
+
 
 class NameManager:
     """
@@ -11,9 +22,10 @@ class NameManager:
     """
     def __init__(self):
         self.link_name_map = {}  # Maps original occurrence names to unique clean names
-        self.link_name_counts = {}  # Tracks count of each base name
-        self.used_names = set()  # Set of all used names
+        self._counts = Counter()  # Tracks how many times each base name was used
+        self._used_names = set()  # Set of all used names
         self.component_to_mesh = {}  # Maps component names to mesh filenames
+        self._clean_cache = {}  # Maps raw names to cleaned names
         
     def clean_name(self, name):
         """
@@ -23,16 +35,16 @@ class NameManager:
         - Remove multiple consecutive underscores
         - Convert to lowercase
         """
-        # Remove commas first
-        cleaned = name.replace(',', '')
-        # Replace spaces, colons, parentheses with underscores
-        cleaned = re.sub('[ :()]', '_', cleaned)
-        # Remove multiple consecutive underscores
-        cleaned = re.sub('_+', '_', cleaned)
-        # Remove leading/trailing underscores
-        cleaned = cleaned.strip('_')
-        # Convert to lowercase
-        cleaned = cleaned.lower()
+        cached = self._clean_cache.get(name)
+        if cached is not None:
+            return cached
+        
+        # Remove commas, replace separators with underscores and collapse
+        # consecutive underscores in a single pass
+        cleaned = _CLEAN_RE.sub(_clean_repl, name)
+        # Remove leading/trailing underscores and convert to lowercase
+        cleaned = cleaned.strip('_').lower()
+        self._clean_cache[name] = cleaned
         return cleaned
     
     def get_mesh_filename(self, component_name):
@@ -50,17 +62,16 @@ class NameManager:
         str
             Cleaned name for mesh file (lowercase, no suffix)
         """
-        if component_name in self.component_to_mesh:
-            return self.component_to_mesh[component_name]
-        
-        # Clean and store
-        mesh_name = self.clean_name(component_name)
-        
-        # Special case for base_link
-        if mesh_name == 'base_link':
-            self.component_to_mesh[component_name] = 'base_link'
-            return 'base_link'
+        mesh_name = self.component_to_mesh.get(component_name)
+        if mesh_name is not None:
+            return mesh_name
         
+        # Clean and store; every base_link variant ("base_link v2",
+        # "base_link (1)") uses the base_link mesh, like its link
+        if is_base_link(component_name):
+            mesh_name = 'base_link'
+        else:
+            mesh_name = self.clean_name(component_name)
         self.component_to_mesh[component_name] = mesh_name
         return mesh_name
     
@@ -82,39 +93,27 @@ class NameManager:
             Unique cleaned name for this link (lowercase)
         """
         # Check if we already processed this exact occurrence
-        if occurrence_name in self.link_name_map:
-            return self.link_name_map[occurrence_name]
+        unique_name = self.link_name_map.get(occurrence_name)
+        if unique_name is not None:
+            return unique_name
         
         # Clean the component name
         base_name = self.clean_name(component_name)
         
-        # Special handling for base_link
-        if base_name == 'base_link':
-            unique_name = 'base_link'
-            if unique_name not in self.used_names:
-                self.link_name_map[occurrence_name] = unique_name
-                self.used_names.add(unique_name)
-                return unique_name
-        
-        # Check if this base name has been used before
-        if base_name in self.link_name_counts:
-            # Increment counter and create unique name
-            self.link_name_counts[base_name] += 1
-            unique_name = f"{base_name}_{self.link_name_counts[base_name]}"
-        else:
-            # First time seeing this base name
-            if base_name in self.used_names:
-                # The base name itself is already used, start with _1
-                self.link_name_counts[base_name] = 1
-                unique_name = f"{base_name}_1"
-            else:
-                # Use the base name as is
-                self.link_name_counts[base_name] = 0
-                unique_name = base_name
+        # The first use keeps the base name (this is also how base_link stays
+        # exactly 'base_link'), later uses get _1, _2, ... suffixes. A name
+        # can already be taken by another base name (e.g. 'leg_1' from
+        # 'Leg (1)'), so keep counting until a free one is found.
+        count = self._counts[base_name]
+        unique_name = base_name if count == 0 else f"{base_name}_{count}"
+        while unique_name in self._used_names:
+            count += 1
+            unique_name = f"{base_name}_{count}"
+        self._counts[base_name] = count + 1
         
         # Store the mapping and mark as used
         self.link_name_map[occurrence_name] = unique_name
-        self.used_names.add(unique_name)
+        self._used_names.add(unique_name)
         
         return unique_name
     
@@ -154,11 +153,12 @@ class NameManager:
         """
         Print the name mapping for debugging
         """
-        print("\n=== Link Name Mapping ===")
-        print("Occurrence -> Unique Link Name | Mesh Filename")
+        lines = ["\n=== Link Name Mapping ===",
+                 "Occurrence -> Unique Link Name | Mesh Filename"]
         for original, unique in sorted(self.link_name_map.items()):
-            print(f"{original} -> {unique}")
-        print("\n=== Component to Mesh Mapping ===")
+            lines.append(f"{original} -> {unique}")
+        lines.append("\n=== Component to Mesh Mapping ===")
         for comp, mesh in sorted(self.component_to_mesh.items()):
-            print(f"{comp} -> {mesh}.stl")
-        print("========================\n")
\ No newline at end of file
+            lines.append(f"{comp} -> {mesh}.stl")
+        lines.append("========================\n")
+        print("\n".join(lines))
\ No newline at end of file
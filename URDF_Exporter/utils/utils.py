@@ -8,13 +8,36 @@ Modified to handle Fusion 360 versioned component names
 
 import adsk, adsk.core, adsk.fusion
 import os.path, re
+import functools
+from dataclasses import dataclass
 from xml.etree import ElementTree
-from xml.dom import minidom
-import shutil
-import fileinput
-import sys
 
 
+# options are .MeshRefinementLow .MeshRefinementMedium .MeshRefinementHigh
+_MESH_REFINEMENT = adsk.fusion.MeshRefinementSettings.MeshRefinementLow
+
+# name given by copy_occs to the original components after copying them
+OLD_COMPONENT_NAME = 'old_component'
+
+_MESH_SEPARATOR_RE = re.compile(r'[ :()]')
+_COLLAPSE_RE = re.compile(r'_+')
+_PACKAGE_NAME_RE = re.compile(rb'<name>[^<]*</name>')
+_PACKAGE_DESCRIPTION_RE = re.compile(rb'<description>[^<]*</description>')
+
+
+@dataclass(slots=True, frozen=True)
+class OccInfo:
+    """
+    Original occurrence recorded by copy_occs before any copy is made
+    """
+    occurrence: object
+    component: object
+    bodies: object
+    name: str
+    mesh_filename: str
+
+
+@functools.lru_cache(maxsize=None)
 def is_base_link(component_name):
     """
     Check if a component name represents the base_link
@@ -31,14 +54,43 @@ def is_base_link(component_name):
         True if this is a base_link component
     """
     # Remove version numbers and whitespace, convert to lowercase for comparison
-    clean_name = component_name.split()[0].lower()
+    clean_name = component_name.split(None, 1)[0].lower()
     return clean_name == 'base_link'
 
 
+@functools.lru_cache(maxsize=None)
+def get_mesh_filename(component_name):
+    """
+    Get the mesh filename for a component when no NameManager is used
+    
+    Parameters
+    ----------
+    component_name: str
+        The component name from Fusion 360
+        
+    Returns
+    -------
+    str
+        Cleaned name for mesh file (lowercase, no suffix)
+    """
+    # every base_link variant uses the base_link mesh, like its link
+    if is_base_link(component_name):
+        return 'base_link'
+    
+    # Clean the component name: remove commas, replace spaces and special characters with underscores, lowercase
+    mesh_filename = component_name.replace(',', '')
+    mesh_filename = _MESH_SEPARATOR_RE.sub('_', mesh_filename)
+    mesh_filename = _COLLAPSE_RE.sub('_', mesh_filename).strip('_')
+    return mesh_filename.lower()
+
+
 def copy_occs(root, name_manager=None):    
     """    
     duplicate all the components - creates new clean copies for STL export
     
+    Occurrences of the same component share their geometry, so only the first
+    occurrence of each component is copied.
+    
     Parameters
     ----------
     root: adsk.fusion.Design.cast(product)
@@ -50,75 +102,145 @@ def copy_occs(root, name_manager=None):
     
     # Store original occurrence info before making changes
     occ_info_list = []
-    for i in range(allOccs.count):
-        occs = allOccs.item(i)
-        if occs.bRepBodies.count > 0:
-            # Get unique name from name manager
+    seen_components = set()
+    for occs in allOccs:
+        component = occs.component
+        # the component's own bodies (not the occurrence's proxies in assembly
+        # context) are copied, and the collection is kept for that
+        bodies = component.bRepBodies
+        if bodies.count:
+            # Only the first occurrence of each component is copied. Entity
+            # tokens must not be compared directly, so the component name
+            # (which the mesh filename comes from) identifies the component.
+            component_name = component.name
+            if component_name in seen_components:
+                continue
+            seen_components.add(component_name)
+            
+            occ_name = occs.name
+            # The copy is named after the mesh the links reference, so
+            # export_stl writes the stl under that same name
             if name_manager:
-                unique_name = name_manager.get_unique_link_name(occs.name, occs.component.name)
+                mesh_filename = name_manager.get_mesh_filename(component_name)
             else:
-                unique_name = re.sub('[ :(),]', '_', occs.component.name)
-                unique_name = re.sub('_+', '_', unique_name).strip('_')
+                mesh_filename = get_mesh_filename(component_name)
             
-            occ_info = {
-                'occurrence': occs,
-                'component': occs.component,
-                'name': occs.name,
-                'unique_name': unique_name,
-                'is_base_link': is_base_link(occs.component.name)
-            }
-            occ_info_list.append(occ_info)
+            occ_info_list.append(OccInfo(occs, component, bodies, occ_name, mesh_filename))
     
     # Create new occurrences from the stored info
     created_occs = []
     for occ_info in occ_info_list:
         try:
-            occs = occ_info['occurrence']
             transform = adsk.core.Matrix3D.create()
             
             # Create new occurrence
             new_occs = allOccs.addNewComponent(transform)
             
-            # Set the new component name
-            if occ_info['is_base_link']:
-                new_occs.component.name = 'base_link'
-            else:
-                new_occs.component.name = occ_info['unique_name']
-            
-            # Get the newly created occurrence
-            new_occs = allOccs.item(allOccs.count - 1)
+            # Set the new component name ('base_link' for the base link)
+            new_occs.component.name = occ_info.mesh_filename
             
             # Copy bodies from original component to new component
-            source_bodies = occ_info['component'].bRepBodies
-            for j in range(source_bodies.count):
-                body = source_bodies.item(j)
+            # (addNewComponent already returned the new occurrence)
+            for j, body in enumerate(occ_info.bodies):
                 try:
                     body.copyToComponent(new_occs)
                 except RuntimeError as e:
                     # Sometimes direct copy fails, try alternative approach
-                    print(f'Warning: Could not copy body {j} from {occ_info["name"]}: {str(e)}')
+                    print(f'Warning: Could not copy body {j} from {occ_info.name}: {str(e)}')
                     continue
             
             created_occs.append(new_occs)
             
         except Exception as e:
-            print(f'Warning: Could not process occurrence {occ_info["name"]}: {str(e)}')
-            continue
-    
-    # Rename original components (mark as old) - skip root component
-    for occ_info in occ_info_list:
+            print(f'Warning: Could not process occurrence {occ_info.name}: {str(e)}')
+        
+        # Rename original component (mark as old) - skip root component
         try:
-            comp = occ_info['component']
+            comp = occ_info.component
             # Don't rename root component
             if comp != root:
-                comp.name = 'old_component'
+                comp.name = OLD_COMPONENT_NAME
         except Exception as e:
             # Skip if we can't rename
-            print(f'Warning: Could not rename component {occ_info["name"]}: {str(e)}')
+            print(f'Warning: Could not rename component {occ_info.name}: {str(e)}')
+
+
+def _geometry_key(bodies):
+    """
+    Fingerprint of the native bodies of a component: bounding box, centroid,
+    volume, area and face/edge/vertex counts of each body. Native bodies are
+    in the component's own coordinates, so the key does not depend on where
+    the part is placed. The centroid separates parts that only differ in
+    where a feature (e.g. a hole) sits inside the same outline.
+    """
+    key = []
+    for body in bodies:
+        box = body.boundingBox
+        centroid = body.physicalProperties.centerOfMass.asArray()
+        key.append(tuple(round(v, 4) for v in box.minPoint.asArray())
+                   + tuple(round(v, 4) for v in box.maxPoint.asArray())
+                   + tuple(round(v, 4) for v in centroid)
+                   + (round(body.volume, 6), round(body.area, 6),
+                      body.faces.count, body.edges.count, body.vertices.count))
+    return tuple(key)
+
+
+def find_mesh_aliases(root, name_manager=None):
+    """
+    Find the components whose geometry is identical to that of an earlier one
+    
+    copy_occs copies the native bodies of every component, so identical
+    components produce identical stl files and only the first needs exporting.
+    Only plain parts are fingerprinted: components without bodies or with
+    child occurrences are exported through their occurrence and keep their
+    own mesh. The design is only read here, not modified.
+    
+    Parameters
+    ----------
+    root: adsk.fusion.Design.cast(product)
+        Root component
+    name_manager: NameManager
+        Manager for handling unique names
+        
+    Returns
+    ----------
+    mesh_aliases: {mesh_filename: mesh_filename of the identical component}
+    """
+    seen_components = set()
+    geom_to_filename = {}
+    mesh_aliases = {}
+    
+    for occs in root.occurrences:
+        component = occs.component
+        component_name = component.name
+        if component_name in seen_components:
             continue
+        seen_components.add(component_name)
+        
+        bodies = component.bRepBodies
+        if not bodies.count or component.occurrences.count:
+            continue
+        
+        if name_manager:
+            mesh_filename = name_manager.get_mesh_filename(component_name)
+        else:
+            mesh_filename = get_mesh_filename(component_name)
+        
+        try:
+            key = _geometry_key(bodies)
+        except Exception as e:
+            # without a key the component simply keeps its own mesh
+            print('Component ' + component_name + ' has something wrong: ' + str(e))
+            continue
+        
+        existing = geom_to_filename.setdefault(key, mesh_filename)
+        if existing != mesh_filename:
+            mesh_aliases[mesh_filename] = existing
+    
+    return mesh_aliases
 
 
-def export_stl(design, save_dir, components, name_manager=None):  
+def export_stl(design, save_dir, name_manager=None, mesh_aliases=None):  
     """
     export stl files into "save_dir/"
     
@@ -127,59 +249,91 @@ def export_stl(design, save_dir, components, name_manager=None):
     design: adsk.fusion.Design.cast(product)
     save_dir: str
         directory path to save
-    components: design.allComponents
     name_manager: NameManager
         Manager for handling unique names
+    mesh_aliases: {mesh_filename: mesh_filename}
+        meshes found by find_mesh_aliases, which are not exported
     """
           
     # create a single exportManager instance
     exportMgr = design.exportManager
-    # get the script location
-    try: os.mkdir(save_dir + '/meshes')
-    except: pass
-    scriptDir = save_dir + '/meshes'  
+    # create the meshes directory if it doesn't exist
+    meshes_dir = os.path.join(save_dir, 'meshes')
+    os.makedirs(meshes_dir, exist_ok=True)
     
-    # Track which meshes we've already exported
+    # Track which components and meshes we've already exported
+    seen_components = set()
     exported_meshes = set()
+    if mesh_aliases is None:
+        mesh_aliases = {}
     
-    # export the occurrence one by one in the component to a specified file
-    for component in components:
-        allOccus = component.allOccurrences
-        for occ in allOccus:
-            if 'old_component' not in occ.component.name:
-                try:
-                    # Get mesh filename (without uniqueness suffix, lowercase)
-                    if name_manager:
-                        mesh_filename = name_manager.get_mesh_filename(occ.component.name)
-                    else:
-                        # Clean the component name: remove commas, replace spaces and special characters with underscores, lowercase
-                        mesh_filename = occ.component.name.replace(',', '')
-                        mesh_filename = re.sub('[ :()]', '_', mesh_filename)
-                        mesh_filename = re.sub('_+', '_', mesh_filename).strip('_')
-                        mesh_filename = mesh_filename.lower()
-                    
-                    # Only export each unique mesh once
-                    if mesh_filename in exported_meshes:
-                        print(f'Skipping duplicate: {mesh_filename} (already exported)')
-                        continue
-                    
-                    print(f'Exporting: {mesh_filename}.stl')
-                    fileName = scriptDir + "/" + mesh_filename
-                    
-                    # create stl exportOptions
-                    stlExportOptions = exportMgr.createSTLExportOptions(occ, fileName)
-                    stlExportOptions.sendToPrintUtility = False
-                    stlExportOptions.isBinaryFormat = True
-                    # options are .MeshRefinementLow .MeshRefinementMedium .MeshRefinementHigh
-                    stlExportOptions.meshRefinement = adsk.fusion.MeshRefinementSettings.MeshRefinementLow
-                    exportMgr.execute(stlExportOptions)
-                    
-                    exported_meshes.add(mesh_filename)
-                    
-                except Exception as e:
-                    print('Component ' + occ.component.name + ' has something wrong: ' + str(e))
+    # collect one occurrence per mesh file; allOccurrences of the root
+    # component visits every occurrence in the design exactly once
+    tasks = []
+    for occ in design.rootComponent.allOccurrences:
+        # every occurrence of a component shares the same mesh
+        component_name = occ.component.name
+        if component_name in seen_components:
+            continue
+        seen_components.add(component_name)
+        
+        if not component_name.startswith(OLD_COMPONENT_NAME):
+            try:
+                # Get mesh filename (without uniqueness suffix, lowercase)
+                if name_manager:
+                    mesh_filename = name_manager.get_mesh_filename(component_name)
+                else:
+                    mesh_filename = get_mesh_filename(component_name)
+                
+                # Only export each unique mesh once
+                if mesh_filename in exported_meshes:
+                    print(f'Skipping duplicate: {mesh_filename} (already exported)')
+                    continue
+                
+                # identical parts under different names share one mesh
+                existing = mesh_aliases.get(mesh_filename)
+                if existing is not None:
+                    print(f'Skipping {mesh_filename}: same geometry as {existing}')
+                    continue
+                
+                exported_meshes.add(mesh_filename)
+                tasks.append((occ, mesh_filename))
+                
+            except Exception as e:
+                print('Component ' + component_name + ' has something wrong: ' + str(e))
+    
+    # export the occurrences one by one. The Fusion API is not thread safe and
+    # must be driven from the main thread, so the exports cannot be parallelized.
+    for occ, mesh_filename in tasks:
+        try:
+            print(f'Exporting: {mesh_filename}.stl')
+            export_one(exportMgr, occ, os.path.join(meshes_dir, mesh_filename))
+        except Exception as e:
+            print('Component ' + occ.component.name + ' has something wrong: ' + str(e))
 
 
+def export_one(exportMgr, occ, fileName):
+    """
+    export a single occurrence as a binary stl file
+    
+    Fusion writes the mesh straight to its final path, so nothing is
+    buffered or read back on the Python side.
+    
+    Parameters
+    ----------
+    exportMgr: adsk.fusion.ExportManager
+    occ: adsk.fusion.Occurrence
+        occurrence to export
+    fileName: str
+        final path of the stl file (Fusion appends the .stl extension)
+    """
+    # create stl exportOptions
+    stlExportOptions = exportMgr.createSTLExportOptions(occ, fileName)
+    stlExportOptions.sendToPrintUtility = False
+    stlExportOptions.isBinaryFormat = True
+    stlExportOptions.meshRefinement = _MESH_REFINEMENT
+    exportMgr.execute(stlExportOptions)
+
 
 def file_dialog(ui):     
     """
@@ -210,12 +364,14 @@ def origin2center_of_mass(inertia, center_of_mass, mass):
     ----------
     moment of inertia about center of mass : [xx, yy, zz, xy, yz, xz]
     """
-    x = center_of_mass[0]
-    y = center_of_mass[1]
-    z = center_of_mass[2]
-    translation_matrix = [y**2 + z**2, x**2 + z**2, x**2 + y**2,
-                         -x*y, -y*z, -x*z]
-    return [round(i - mass*t, 6) for i, t in zip(inertia, translation_matrix)]
+    x, y, z = center_of_mass[0], center_of_mass[1], center_of_mass[2]
+    xx, yy, zz = x*x, y*y, z*z
+    return [round(inertia[0] - mass*(yy + zz), 6),
+            round(inertia[1] - mass*(xx + zz), 6),
+            round(inertia[2] - mass*(xx + yy), 6),
+            round(inertia[3] + mass*(x*y), 6),
+            round(inertia[4] + mass*(y*z), 6),
+            round(inertia[5] + mass*(x*z), 6)]
 
 
 def prettify(elem):
@@ -230,22 +386,42 @@ def prettify(elem):
     ----------
     pretified xml : str
     """
-    rough_string = ElementTree.tostring(elem, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    return reparsed.toprettyxml(indent="  ")
+    # indent in place instead of reparsing through minidom
+    ElementTree.indent(elem, space="  ")
+    return '<?xml version="1.0" ?>\n' + ElementTree.tostring(elem, encoding="unicode") + '\n'
+
+
+def prettify_to(elem, file_obj):
+    """
+    Write the Element as a pretty-printed XML document into a file
+    
+    The tree is serialized straight into the file instead of being built up
+    as a string first.
+    
+    Parameters
+    ----------
+    elem : xml.etree.ElementTree.Element
+    file_obj : file object opened in binary mode
+    """
+    ElementTree.indent(elem, space="  ")
+    ElementTree.ElementTree(elem).write(file_obj, encoding='utf-8', xml_declaration=True)
+    file_obj.write(b'\n')
 
 
 def copy_package(save_dir, package_dir):
+    # only needed here, once per export
+    import shutil
+    
     try:
-        # Check if the target directory exists, if not, create it
-        if not os.path.exists(save_dir + '/launch'):
-            os.mkdir(save_dir + '/launch')
-        if not os.path.exists(save_dir + '/urdf'):
-            os.mkdir(save_dir + '/urdf')
+        # Create the target directories if they don't exist
+        os.makedirs(os.path.join(save_dir, 'launch'), exist_ok=True)
+        os.makedirs(os.path.join(save_dir, 'urdf'), exist_ok=True)
         
         # Check if the package directory exists and copy it
         if os.path.exists(package_dir):
-            shutil.copytree(package_dir, save_dir, dirs_exist_ok=True)
+            # template metadata is irrelevant, so skip copy2's stat/utime calls
+            shutil.copytree(package_dir, save_dir, dirs_exist_ok=True,
+                            copy_function=shutil.copyfile)
         else:
             print(f"Package directory '{package_dir}' does not exist.")
         
@@ -253,23 +429,41 @@ def copy_package(save_dir, package_dir):
         print(f"Error copying package: {e}")
 
 
+def replace_in_file(file_name, replacements):
+    """
+    Apply replacements to "file_name" with a single read and write
+    
+    The file is handled as bytes to skip the text decode/encode round trip.
+    
+    Parameters
+    ----------
+    file_name: str
+        path of the file to update
+    replacements: [(old, new)]
+        applied in order. old is either a string, whose every occurrence is
+        replaced, or a precompiled bytes pattern, whose first match is replaced.
+    """
+    with open(file_name, 'rb') as f:
+        data = f.read()
+    for old, new in replacements:
+        new = new.encode()
+        if isinstance(old, str):
+            data = data.replace(old.encode(), new)
+        else:
+            # a function as replacement keeps new free of escape processing
+            data = old.sub(lambda m: new, data, count=1)
+    with open(file_name, 'wb') as f:
+        f.write(data)
+
+
 def update_cmakelists(save_dir, package_name):
     file_name = save_dir + '/CMakeLists.txt'
-
-    for line in fileinput.input(file_name, inplace=True):
-        if 'project(fusion2urdf)' in line:
-            sys.stdout.write("project(" + package_name + ")\n")
-        else:
-            sys.stdout.write(line)
+    replace_in_file(file_name, [('project(fusion2urdf)', 'project(' + package_name + ')')])
 
 
 def update_package_xml(save_dir, package_name):
     file_name = save_dir + '/package.xml'
-
-    for line in fileinput.input(file_name, inplace=True):
-        if '<name>' in line:
-            sys.stdout.write("  <name>" + package_name + "</name>\n")
-        elif '<description>' in line:
-            sys.stdout.write("<description>The " + package_name + " package</description>\n")
-        else:
-            sys.stdout.write(line)
\ No newline at end of file
+    # only the first tags are the package's own name and description
+    replace_in_file(file_name, [
+        (_PACKAGE_NAME_RE, '<name>' + package_name + '</name>'),
+        (_PACKAGE_DESCRIPTION_RE, '<description>The ' + package_name + ' package</description>')])